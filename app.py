@@ -7,10 +7,11 @@ Directory scanner with dark theme and neon blue accents
 from flask import Flask, render_template, request, jsonify, send_file
 import os
 import threading
-from scanner import DirScanner
+from scanner import DirScanner, format_timestamp
 from datetime import datetime
 import json
 import tempfile
+import atexit
 
 app = Flask(__name__)
 
@@ -24,8 +25,23 @@ app.config['REPORTS_FOLDER'] = os.path.join(BASE_DIR, 'reports')
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['REPORTS_FOLDER'], exist_ok=True)
 
-# Store temporary uploaded wordlists in memory (cleared on server restart)
+# Temporary uploaded wordlists: filename -> temp file path
 temp_wordlists = {}
+# Every uploaded temp file, including replaced ones a running scan may still be
+# reading (deleted on server exit)
+temp_wordlist_files = []
+
+@atexit.register
+def remove_temp_wordlists():
+    """Delete uploaded wordlist files when the server exits"""
+    for path in temp_wordlist_files:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+# Serializes writers of current_scan; status readers never take it
+scan_lock = threading.Lock()
 
 # Global variables to track scan status
 current_scan = {
@@ -33,10 +49,13 @@ current_scan = {
     'progress': 0,
     'total': 0,
     'results': [],
-    'scanner': None,
-    'stop_requested': False  # Flag to stop the scan
+    'scanner': None
 }
 
+def serialize_results(results):
+    """Convert scanner hits to JSON dicts, formatting the raw timestamps for display"""
+    return [dict(result._asdict(), timestamp=format_timestamp(result.timestamp)) for result in results]
+
 @app.route('/')
 def index():
     """Main page"""
@@ -54,7 +73,7 @@ def index():
 
 @app.route('/upload_wordlist', methods=['POST'])
 def upload_wordlist():
-    """Upload a temporary wordlist (stored in memory, not saved to disk)"""
+    """Upload a temporary wordlist (kept in a temp file, not in the wordlists folder)"""
     if 'wordlist' not in request.files:
         return jsonify({'success': False, 'error': 'No file provided'})
     
@@ -64,11 +83,15 @@ def upload_wordlist():
     
     if file and file.filename.endswith('.txt'):
         try:
-            # Read file content into memory
-            content = file.read().decode('utf-8')
+            # Stream the upload straight to disk; scans read it from there directly
+            temp_file = tempfile.NamedTemporaryFile(prefix='pathhunter_', suffix='.txt', delete=False)
+            temp_file.close()
+            file.save(temp_file.name)
             
-            # Store in memory with temporary flag
-            temp_wordlists[file.filename] = content
+            # Replace any earlier upload with the same name; its file stays until
+            # exit, since a scan started from it may not have read it yet
+            temp_wordlist_files.append(temp_file.name)
+            temp_wordlists[file.filename] = temp_file.name
             
             return jsonify({
                 'success': True, 
@@ -83,18 +106,14 @@ def upload_wordlist():
 @app.route('/start_scan', methods=['POST'])
 def start_scan():
     """Start a new scan"""
+    # Only one request at a time may stop and replace current_scan
+    with scan_lock:
+        return _start_scan()
+
+def _start_scan():
+    """Validate a scan request, stop any running scan and launch the new one (caller holds scan_lock)"""
     global current_scan
     
-    # If a scan is running, force stop it IMMEDIATELY
-    if current_scan['running']:
-        print("[!] Stopping previous scan...")
-        current_scan['stop_requested'] = True
-        current_scan['running'] = False  # Force it to stop immediately
-        
-        # Give it a tiny moment
-        import time
-        time.sleep(0.2)
-    
     data = request.json
     target = data.get('target', '').strip()
     wordlists = data.get('wordlists', [])
@@ -115,75 +134,62 @@ def start_scan():
     
     # Prepare wordlist paths - handle both permanent and temporary wordlists
     wordlist_paths = []
-    temp_files = []
     
     for wl in wordlists:
         if wl in temp_wordlists:
-            # Temporary wordlist - create a temp file for this scan
-            import tempfile
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-            temp_file.write(temp_wordlists[wl])
-            temp_file.close()
-            wordlist_paths.append(temp_file.name)
-            temp_files.append(temp_file.name)
+            # Temporary wordlist - already on disk since upload
+            wordlist_paths.append(temp_wordlists[wl])
         else:
             # Permanent wordlist from disk
             wordlist_paths.append(os.path.join(app.config['UPLOAD_FOLDER'], wl))
     
+    # Create scanner first - an invalid target must leave the current scan untouched
+    try:
+        scanner = DirScanner(
+            target=target,
+            wordlists=wordlist_paths,
+            threads=threads,
+            timeout=timeout,
+            extensions=ext_list
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
+    # If a scan is running, force stop it IMMEDIATELY
+    if current_scan['running']:
+        print("[!] Stopping previous scan...")
+        if current_scan['scanner'] is not None:
+            current_scan['scanner'].stop()
+        current_scan['running'] = False  # Force it to stop immediately
+        
+        # Give it a tiny moment
+        import time
+        time.sleep(0.2)
+    
     # RESET current scan - clear previous results
     current_scan = {
         'running': True,
         'progress': 0,
         'total': 0,
         'results': [],
-        'scanner': None,
-        'target': target,
-        'temp_files': temp_files,
-        'stop_requested': False
+        'scanner': scanner,
+        'target': target
     }
     
-    # Create scanner
-    scanner = DirScanner(
-        target=target,
-        wordlists=wordlist_paths,
-        threads=threads,
-        timeout=timeout,
-        extensions=ext_list
-    )
-    
-    current_scan['scanner'] = scanner
-    
     # Start scan in background thread
+    # Bind this run to its own state so a superseded scan never touches the new one
+    scan_state = current_scan
+    
     def run_scan():
-        global current_scan
         try:
-            # Disable SSL warnings
-            import urllib3
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            
-            # Pass stop flag to scanner
-            scanner.stop_flag = lambda: current_scan.get('stop_requested', False)
             results = scanner.scan()
             
-            current_scan['results'] = results
-            current_scan['running'] = False
-            
-            # Clean up temporary files
-            for temp_file in current_scan.get('temp_files', []):
-                try:
-                    os.unlink(temp_file)
-                except:
-                    pass
+            scan_state['results'] = results
+            scan_state['running'] = False
                     
         except Exception as e:
             print(f"Scan error: {str(e)}")
-            current_scan['running'] = False
-            # Clean up temporary files on error too
-            for temp_file in current_scan.get('temp_files', []):
-                try:
-                    os.unlink(temp_file)
-                except:
-                    pass
+            scan_state['running'] = False
     
     thread = threading.Thread(target=run_scan)
     thread.daemon = True
@@ -203,7 +209,7 @@ def scan_status():
             'progress': scanner.scanned,
             'total': scanner.total,
             'results_count': len(scanner.results),
-            'results': scanner.results[-10:]  # Last 10 results
+            'results': serialize_results(scanner.results[-10:])  # Last 10 results
         })
     
     return jsonify({
@@ -219,8 +225,9 @@ def stop_scan():
     """Stop the current scan"""
     global current_scan
     
-    if current_scan['running']:
-        current_scan['stop_requested'] = True
+    scanner = current_scan.get('scanner')
+    if current_scan['running'] and scanner:
+        scanner.stop()
         return jsonify({'success': True, 'message': 'Stopping scan...'})
     
     return jsonify({'success': False, 'message': 'No scan running'})
@@ -233,12 +240,12 @@ def get_results():
     scanner = current_scan.get('scanner')
     if scanner:
         return jsonify({
-            'results': scanner.results,
+            'results': serialize_results(scanner.results),
             'target': current_scan.get('target', '')
         })
     
     return jsonify({
-        'results': current_scan['results'],
+        'results': serialize_results(current_scan['results']),
         'target': current_scan.get('target', '')
     })
 
@@ -275,8 +282,7 @@ if __name__ == '__main__':
     print("\n🌐 Server starting on http://localhost:5000")
     print("🔷 Press Ctrl+C to stop\n")
     
-    if __name__ == "__main__":
-        import os
-        port = int(os.environ.get("PORT", 5000))
-        app.run(host="0.0.0.0", port=port)
+    port = int(os.environ.get("PORT", 5000))
+    # Serve each request on its own thread so /scan_status polls never queue behind other endpoints
+    app.run(host="0.0.0.0", port=port, threaded=True)
 